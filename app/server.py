@@ -1,7 +1,14 @@
 # app/server.py
-from flask import Flask, send_from_directory, jsonify
+from flask import Flask, Response, abort, request, send_from_directory
 from flask_cors import CORS
-import pandas as pd
+from shapely.geometry import box
+import geopandas as gpd
+import csv
+import functools
+import hashlib
+import math
+import mimetypes
+import orjson
 import os
 
 app = Flask(__name__, static_folder="static", template_folder="static")
@@ -9,6 +16,44 @@ app = Flask(__name__, static_folder="static", template_folder="static")
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, "..", "data")
 
+# Upper bound on points returned by one /api/trees_in_bbox call
+MAX_BBOX_TREES = 50000
+
+# Precompressed siblings written by preprocess_data.py, most preferred first
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+PROCESSED_MAX_AGE = 86400
+
+# Small layers kept in memory; DEM tiles and other files are read from disk
+PRELOADED_FILES = ("wards.geojson", "schools.geojson", "trees_grid.geojson")
+
+mimetypes.add_type("application/geo+json", ".geojson")
+
+def _file_mtime(path):
+    return os.path.getmtime(path) if os.path.isfile(path) else None
+
+def _variant_mtimes(path):
+    # mtimes of the original, then of each PRECOMPRESSED sibling
+    return (_file_mtime(path),) + tuple(_file_mtime(path + suffix) for _, suffix in PRECOMPRESSED)
+
+@functools.lru_cache(maxsize=8)
+def _processed_variants(path, mtimes):
+    # mtimes are part of the cache key so a re-run of preprocess_data.py is
+    # picked up; returns {encoding or None: (body, etag)}
+    variants = {}
+    for (encoding, suffix), mtime in zip(((None, ""),) + PRECOMPRESSED, mtimes):
+        if mtime is not None and mtime >= mtimes[0]:
+            with open(path + suffix, "rb") as f:
+                body = f.read()
+            variants[encoding] = (body, hashlib.sha1(body).hexdigest())
+    return variants
+
+# Load the small layers once at startup
+for _name in PRELOADED_FILES:
+    _path = os.path.join(DATA_DIR, "processed", _name)
+    _mtimes = _variant_mtimes(_path)
+    if _mtimes[0] is not None:
+        _processed_variants(_path, _mtimes)
+
 @app.route("/")
 def root():
     # serve index.html from app/static
@@ -19,26 +64,105 @@ def root():
 def static_files(filename):
     return send_from_directory(app.static_folder, filename)
 
+def _preloaded_response(filename, path, mtimes):
+    # Pick the best in-memory variant the client accepts
+    variants = _processed_variants(path, mtimes)
+    encoding = next(
+        (enc for enc, _ in PRECOMPRESSED if enc in variants and enc in request.accept_encodings),
+        None,
+    )
+    body, etag = variants[encoding]
+    response = Response(body, mimetype=mimetypes.guess_type(filename)[0])
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.set_etag(etag)
+    response.last_modified = mtimes[0]
+    response.cache_control.public = True
+    response.cache_control.max_age = PROCESSED_MAX_AGE
+    response.vary.add("Accept-Encoding")
+    return response.make_conditional(request)
+
 # Serve all files under /data/processed/
 @app.route("/data/processed/<path:filename>")
 def processed_data(filename):
-    return send_from_directory(os.path.join(DATA_DIR, "processed"), filename)
+    if filename in PRELOADED_FILES:
+        path = os.path.join(DATA_DIR, "processed", filename)
+        mtimes = _variant_mtimes(path)
+        if mtimes[0] is not None:
+            return _preloaded_response(filename, path, mtimes)
+    return send_from_directory(os.path.join(DATA_DIR, "processed"), filename, max_age=PROCESSED_MAX_AGE)
 
 
 # --- API endpoints ---
+# Typed columns of the processed CSVs; anything not listed stays a string
+CSV_COLUMN_TYPES = {
+    "ward_stats.csv": {"num_schools": int, "avg_elev": float},
+    "ward_tree_counts.csv": {"count": int},
+}
+
+@functools.lru_cache(maxsize=8)
+def _csv_records_json(csv_path, mtime):
+    # mtime is part of the cache key so a regenerated CSV is picked up
+    types = CSV_COLUMN_TYPES.get(os.path.basename(csv_path), {})
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        records = [
+            {col: types.get(col, str)(val) if val != "" else None for col, val in row.items()}
+            for row in csv.DictReader(f)
+        ]
+    return orjson.dumps(records)
+
+def _csv_json_response(name):
+    csv_path = os.path.join(DATA_DIR, "processed", name)
+    body = _csv_records_json(csv_path, os.path.getmtime(csv_path))
+    return Response(body, mimetype="application/json")
+
 @app.route("/api/ward_stats")
 def ward_stats():
-    csv_path = os.path.join(DATA_DIR, "processed", "ward_stats.csv")
-    df = pd.read_csv(csv_path, dtype={"ward_id": str})
-    records = df.where(pd.notnull(df), None).to_dict(orient="records")
-    return jsonify(records)
+    return _csv_json_response("ward_stats.csv")
 
 @app.route("/api/ward_tree_counts")
 def ward_tree_counts():
-    csv_path = os.path.join(DATA_DIR, "processed", "ward_tree_counts.csv")
-    df = pd.read_csv(csv_path, dtype={"ward_id": str})
-    records = df.where(pd.notnull(df), None).to_dict(orient="records")
-    return jsonify(records)
+    return _csv_json_response("ward_tree_counts.csv")
+
+@functools.lru_cache(maxsize=1)
+def _trees_frame(path, mtime):
+    # Loaded on first use; mtime is part of the cache key so a regenerated
+    # trees.fgb is picked up
+    trees = gpd.read_file(path, columns=["tree_type"], engine="pyogrio")
+    trees.sindex  # build the spatial index up front
+    return trees
+
+@app.route("/api/trees_in_bbox")
+def trees_in_bbox():
+    try:
+        minx, miny, maxx, maxy = (float(v) for v in request.args["bbox"].split(","))
+    except (KeyError, ValueError):
+        abort(400, "bbox must be minx,miny,maxx,maxy")
+    if not all(math.isfinite(v) for v in (minx, miny, maxx, maxy)):
+        abort(400, "bbox must be minx,miny,maxx,maxy")
+
+    trees_path = os.path.join(DATA_DIR, "processed", "trees.fgb")
+    trees = _trees_frame(trees_path, os.path.getmtime(trees_path))
+    idx = trees.sindex.query(box(minx, miny, maxx, maxy), predicate="intersects")
+    truncated = len(idx) > MAX_BBOX_TREES
+    subset = trees.iloc[idx[:MAX_BBOX_TREES]]
+
+    features = [
+        {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [x, y]},
+            "properties": {"tree_type": t},
+        }
+        for x, y, t in zip(subset.geometry.x.tolist(), subset.geometry.y.tolist(), subset["tree_type"].tolist())
+    ]
+    body = orjson.dumps({"type": "FeatureCollection", "features": features, "truncated": truncated})
+    return Response(body, mimetype="application/geo+json")
+
+# Serialize both payloads once at startup
+for _name in ("ward_stats.csv", "ward_tree_counts.csv"):
+    _path = os.path.join(DATA_DIR, "processed", _name)
+    if os.path.exists(_path):
+        _csv_records_json(_path, os.path.getmtime(_path))
 
 if __name__ == "__main__":
     # Run: python server.py (inside app folder)
@@ -163,39 +163,84 @@ function loadSchools(){
 }
 
 // Trees
+// Full point detail is only fetched for the visible bbox at high zoom;
+// the heatmap uses the pre-binned grid from preprocessing.
+const TREE_DETAIL_MIN_ZOOM = 15;
+let treeRequestSeq = 0;
+
 function loadTrees(){
-  fetch("/data/processed/trees.geojson").then(r=>r.json()).then(data=>{
-    treeCluster = L.markerClusterGroup({
-      spiderfyOnMaxZoom: true,
-      showCoverageOnHover: false,
-      maxClusterRadius: 40
-    });
+  treeCluster = L.markerClusterGroup({
+    spiderfyOnMaxZoom: true,
+    showCoverageOnHover: false,
+    maxClusterRadius: 40
+  });
+  treeCluster.addTo(map);
+  ensureLayerControl().addOverlay(treeCluster, `Trees (cluster, zoom ${TREE_DETAIL_MIN_ZOOM}+)`);
 
-    data.features.forEach(f => {
-      const coords = f.geometry && f.geometry.coordinates;
-      if (!coords) return;
-      const latlng = L.latLng(coords[1], coords[0]);
-      const marker = L.circleMarker(latlng, {
+  map.on("moveend", refreshTreesInView);
+  map.on("overlayadd", e => { if (e.layer === treeCluster) refreshTreesInView(); });
+  map.on("overlayremove", e => { if (e.layer === treeCluster) setTreeNotice(""); });
+  refreshTreesInView();
+
+  fetch("/data/processed/trees_grid.geojson").then(r=>r.json()).then(data=>{
+    const maxCount = data.features.reduce((m, f) => Math.max(m, f.properties.count || 0), 1);
+    const heatPts = data.features.map(f => {
+      const c = f.geometry && f.geometry.coordinates;
+      if (!c) return null;
+      return [c[1], c[0], (f.properties.count || 0) / maxCount];
+    }).filter(Boolean);
+
+    treeHeat = L.heatLayer(heatPts, { radius: 18, blur: 25, maxZoom: 17 });
+    ensureLayerControl().addOverlay(treeHeat, "Tree Heatmap");
+  }).catch(e=>console.error("Failed to load trees_grid.geojson:", e));
+}
+
+function refreshTreesInView(){
+  const seq = ++treeRequestSeq;
+  if (!map.hasLayer(treeCluster)) return;  // overlay switched off, nothing to draw
+  if (map.getZoom() < TREE_DETAIL_MIN_ZOOM) {
+    treeCluster.clearLayers();
+    setTreeNotice("");
+    return;
+  }
+
+  const bbox = map.getBounds().toBBoxString();
+  fetch(`/api/trees_in_bbox?bbox=${bbox}`).then(r=>r.json()).then(data=>{
+    if (seq !== treeRequestSeq) return;  // a newer view was requested meanwhile
+
+    const markers = data.features.map(f => {
+      const coords = f.geometry.coordinates;
+      return L.circleMarker(L.latLng(coords[1], coords[0]), {
         radius: 3,
         color: "green",
         fillColor: "green",
         fillOpacity: 0.6
       });
-      treeCluster.addLayer(marker);
     });
 
-    treeCluster.addTo(map);
-    ensureLayerControl().addOverlay(treeCluster, "Trees (cluster)");
+    treeCluster.clearLayers();
+    treeCluster.addLayers(markers);
+    setTreeNotice(data.truncated
+      ? `Showing the first ${markers.length.toLocaleString()} trees in this view. Zoom in to see all of them.`
+      : "");
+  }).catch(e=>console.error("Failed to load trees in view:", e));
+}
 
-    const heatPts = data.features.map(f => {
-      const c = f.geometry && f.geometry.coordinates;
-      if (!c) return null;
-      return [c[1], c[0], 0.5];
-    }).filter(Boolean);
+// Notice shown on the map when the tree layer is incomplete for the view
+const treeNotice = L.control({ position: "bottomleft" });
 
-    treeHeat = L.heatLayer(heatPts, { radius: 18, blur: 25, maxZoom: 17 });
-    ensureLayerControl().addOverlay(treeHeat, "Tree Heatmap");
-  }).catch(e=>console.error("Failed to load trees.geojson:", e));
+treeNotice.onAdd = function () {
+  const div = L.DomUtil.create("div", "info tree-notice");
+  div.style.display = "none";
+  return div;
+};
+
+treeNotice.addTo(map);
+
+function setTreeNotice(text){
+  const div = treeNotice.getContainer();
+  div.textContent = text;
+  div.style.display = text ? "" : "none";
 }
 
 // DEM Color